@@ -2,17 +2,32 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import json
+import threading
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 from urllib.parse import quote_plus, unquote_plus
 from streamlit.components.v1 import html as st_html
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
 from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+
+try:
+    import connectorx as cx
+except ImportError:  # opcional: sin connectorx se usa pandas + SQLAlchemy
+    cx = None
 
 # ==========================================
 # CONFIGURACIÓN GENERAL DEL DASHBOARD
@@ -26,11 +41,66 @@ st.set_page_config(
 
 GEOJSON_PATH = Path(__file__).parent / "mapita.geojson"
 
+# ==========================================
+# PATRONES (regex precompilados para las normalizaciones)
+# ==========================================
+
+def _re_alguno(*textos: str) -> re.Pattern:
+    """Patrón que encuentra cualquiera de los textos literales."""
+    return re.compile("|".join(re.escape(t) for t in textos))
+
+_RE_GUATEMALA     = _re_alguno("502", "guatemala", "gtm")
+_RE_TIENE_NINO    = _re_alguno("niñ", "hijo", "hija")
+_RE_HOMBRE        = _re_alguno("hombre", "soy hombre", "masculino")
+_RE_DIGITS        = re.compile(r"(\d+)")
+_RE_NO_ESTUDIA    = _re_alguno("no estudia", "ya no estudia")
+_RE_NO_INDICA     = _re_alguno("no indica", "no responde")
+_RE_NO_RECUERDA   = _re_alguno("no recuerda", "no se", "no sé")
+_RE_UNIVERSIDAD   = _re_alguno(
+    "cirug", "ingenier", "medicin", "odontolog", "título de licenciatura",
+    "titulo de licenciatura", "licenciatura", "etc.",
+)
+_RE_5_MIN         = _re_alguno("5 min", "5 minutos")
+_RE_10_MIN        = _re_alguno("10 min", "10 minutos")
+_RE_30_MIN        = _re_alguno("30 minutos", "30 min", "media hora")
+_RE_1_HORA        = _re_alguno("1hr", "1 hr", "1 hora")
+_RE_2_HORAS       = _re_alguno("2 horas", "dos horas")
+_RE_MAS_6_HORAS   = _re_alguno("más de 6 horas", "mas de 6 horas")
+_RE_MENOS_1_HORA  = _re_alguno("menos de 1 hora", "minutos")
+_RE_NO_SABE_SALUD = _re_alguno("no indica", "no se", "no sé")
+_RE_MINS          = re.compile(r"(\d+)\s*min")
+_RE_HORAS         = re.compile(r"(\d+)\s*hora")
+_RE_AYUDA         = _re_alguno("ayuda", "apoyo", "apoyar")
+_RE_ATENCION      = _re_alguno("atenci", "servicio")
+_RE_MEDICA        = _re_alguno("médica", "medica", "doctor")
+_RE_UNE           = _re_alguno("unidad nacional de la esperanza", " une")
+_RE_PAN           = _re_alguno("avanzada nacional", " pan")
+_RE_NO_SABE       = _re_alguno("no sabe", "no se", "no sé")
+_RE_NINGUNO       = _re_alguno("ninguno", "nadie")
+_RE_NS_NR         = _re_alguno("no sabe", "no se", "no responde", "ns/nr", "nsnr")
+_RE_NEUTRO        = _re_alguno("ni de acuerdo ni en desacuerdo", "ni acuerdo ni desacuerdo")
+_RE_MUY_TOTAL     = _re_alguno("totalmente", "muy")
+_RE_NO_ME_IMPORTA = _re_alguno("no me importa", "doesnt matter", "doesn't matter")
+_RE_NO_LE_IMPORTA = _re_alguno("no le importaria", "wouldnt mind", "wouldn't mind")
+
+# Preguntas de acuerdo/desacuerdo que comparten normalize_likert_agreement
+LIKERT_LABEL_PATTERNS = re.compile(
+    r"(si una mujer gana más que su marido es casi seguro que creará problemas"
+    r"|employers should give priority|jobs scarce|men should have more right"
+    r"|children duty to take care|take care of ill parent|cuidado continuo)",
+    re.I,
+)
+
 # ==========================================
 # ESTILOS PERSONALIZADOS (CSS)
 # ==========================================
 
+# preconnect: abre la conexión a los CDN de fuentes/íconos antes de que
+# el navegador llegue a los @import del <style>
 CUSTOM_CSS = """
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="preconnect" href="https://cdnjs.cloudflare.com" crossorigin>
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap');
 @import url('https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css');
@@ -152,6 +222,13 @@ body, [class^="css"] {
     line-height: 1.35;
 }
 
+/* rejilla de 3 columnas para las tarjetas de categorías (un solo st.markdown) */
+.wvs-cat-grid {
+    display: grid;
+    grid-template-columns: repeat(3, minmax(0, 1fr));
+    column-gap: 1rem;
+}
+
 .section-divider {
     border-top: 1px solid #cbd5e1;
     margin: 1.8rem 0;
@@ -170,13 +247,64 @@ st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 PCT_MIN_2025 = 0.5
 PG_SCHEMA = "WVS"
 PG_TABLE  = "encuestas_2020_2025"
+# conteos precalculados: se crean con sql/001_mv_cat_year_resp.sql y hay que
+# correr REFRESH MATERIALIZED VIEW después de cada carga (ETL) de PG_TABLE.
+# Si la vista no existe, las consultas caen a la tabla (ver conteos_relation)
+PG_MV_CAT = "mv_cat_year_resp"
+CACHE_TTL = 3600  # segundos que se guardan en caché las consultas
 
+@st.cache_resource(show_spinner=False)
 def get_engine():
+    """
+    Engine único por proceso (cache_resource) con pool de conexiones,
+    para no pagar el handshake TLS + auth de Neon en cada consulta.
+    """
     url = st.secrets["postgres"]["url"]
-    return create_engine(url)
-
-engine = get_engine()
+    # pool_size=5 alcanza para el hilo principal + los 4 del prefetch;
+    # LIFO reusa la conexión más reciente (caliente) y deja que las demás
+    # caduquen solas en vez de reabrir varias cada rato
+    return create_engine(
+        url,
+        pool_size=5,
+        max_overflow=2,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_use_lifo=True,
+    )
 
+def read_sql_arrow(query, params: dict, partition_on: str = None) -> pd.DataFrame:
+    """
+    Para consultas grandes: con connectorx el resultado va directo de
+    Postgres a Arrow (protocolo binario, sin pasar por filas de Python)
+    y se devuelve con backend pyarrow. Sin connectorx cae a pd.read_sql
+    con el engine. Las consultas de catálogo pequeñas siguen usando el
+    engine directo.
+    partition_on: columna numérica para leer en 2 hilos (p. ej. year,
+    un hilo por 2020 y otro por 2025).
+    """
+    if cx is None:
+        with get_engine().connect() as conn:
+            return pd.read_sql(query, conn, params=params, dtype_backend="pyarrow")
+
+    # connectorx no acepta parámetros: SQLAlchemy los renderiza como
+    # literales. Quien llame debe validar antes los valores que vengan de
+    # la URL (literal_binds no es seguro con entrada arbitraria).
+    sql = str(
+        query.bindparams(**params).compile(
+            dialect=postgresql.dialect(paramstyle="named"),
+            compile_kwargs={"literal_binds": True},
+        )
+    ).strip().rstrip(";")
+    url = make_url(st.secrets["postgres"]["url"]).set(drivername="postgresql")
+    partition = {"partition_on": partition_on, "partition_num": 2} if partition_on else {}
+    table = cx.read_sql(
+        url.render_as_string(hide_password=False),
+        sql,
+        protocol="binary",
+        return_type="arrow",
+        **partition,
+    )
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
 
 # columnas
@@ -197,20 +325,32 @@ COL_AGRUP      = "agrupacion"
 # CONSULTAS A POSTGRES
 # ==========================================
 
-def has_data_for_categoria(agrupacion: str, categoria: str) -> bool:
-    q = text(f"""
-        SELECT 1
-        FROM "{PG_SCHEMA}".{PG_TABLE}
-        WHERE {COL_AGRUP} = :agr
-          AND {COL_CATEGORIA} = :cat
-          AND {COL_RESPUESTA} IS NOT NULL
-          AND {COL_YEAR} IN (2020, 2025)
-        LIMIT 1;
-    """)
-    with engine.connect() as conn:
-        df = pd.read_sql(q, conn, params={"agr": agrupacion, "cat": categoria})
-    return not df.empty
+# misma agregación que la vista PG_MV_CAT, directo sobre la tabla
+SQL_CONTEOS_TABLA = f"""(
+            SELECT
+                {COL_AGRUP}, {COL_CATEGORIA}, {COL_YEAR}, {COL_RESPUESTA},
+                {COL_LABEL_ES}, respuesta_grafica, respuesta_normalizada,
+                COUNT(*) AS n
+            FROM "{PG_SCHEMA}".{PG_TABLE}
+            WHERE {COL_RESPUESTA} IS NOT NULL
+              AND {COL_YEAR} IN (2020, 2025)
+            GROUP BY 1, 2, 3, 4, 5, 6, 7
+        ) AS conteos_tabla"""
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def conteos_relation() -> str:
+    """
+    Relación (para el FROM) con los conteos por agrupación × categoría ×
+    año × respuesta: la vista materializada si ya se aplicó la migración,
+    si no la misma agregación sobre la tabla, para no fallar con
+    UndefinedTable en una base sin la vista.
+    """
+    mv = f'"{PG_SCHEMA}".{PG_MV_CAT}'
+    with get_engine().connect() as conn:
+        existe = conn.execute(text("SELECT to_regclass(:rel)"), {"rel": mv}).scalar()
+    return mv if existe is not None else SQL_CONTEOS_TABLA
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
 def load_agrupaciones() -> List[str]:
     query = text(f"""
         SELECT DISTINCT {COL_AGRUP} AS agrupacion
@@ -218,23 +358,28 @@ def load_agrupaciones() -> List[str]:
         WHERE {COL_AGRUP} IS NOT NULL
         ORDER BY agrupacion;
     """)
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         df = pd.read_sql(query, conn)
     return df["agrupacion"].dropna().tolist()
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
 def load_categorias(agrupacion: str) -> List[str]:
     """
     Devuelve las categorías limpias (sin espacios, sin vacías, sin 'none')
     y solo aquellas que tienen datos.
+    El listado y la verificación de datos 2020/2025 salen del mismo
+    recorrido de la tabla (GROUP BY + HAVING).
     """
     query = text(f"""
-        SELECT DISTINCT {COL_CATEGORIA} AS categoria
+        SELECT {COL_CATEGORIA} AS categoria
         FROM "{PG_SCHEMA}".{PG_TABLE}
         WHERE {COL_AGRUP} = :agr
           AND {COL_CATEGORIA} IS NOT NULL
+        GROUP BY {COL_CATEGORIA}
+        HAVING bool_or({COL_RESPUESTA} IS NOT NULL AND {COL_YEAR} IN (2020, 2025))
         ORDER BY categoria;
     """)
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         df = pd.read_sql(query, conn, params={"agr": agrupacion})
 
     if df.empty:
@@ -252,49 +397,29 @@ def load_categorias(agrupacion: str) -> List[str]:
         (~cats_raw.str.lower().isin(["none", "nan"]))
     ]
 
-    cats = cats_raw.unique().tolist()
-
-    # filtramos las que no tienen datos reales
-    cats = [c for c in cats if has_data_for_categoria(agrupacion, c)]
-    return cats
+    return cats_raw.unique().tolist()
 
 # ==========================================
 # UTILIDADES % / MULTI-RESPUESTAS
 # ==========================================
 
-def fmt_pct(x: float) -> float:
-    if pd.isna(x):
-        return 0.0
-    return round(float(x), 2)
-
-def explode_multiselect(df: pd.DataFrame, col: str = COL_RESPUESTA) -> pd.DataFrame:
-    df = df.copy()
-    df[col] = df[col].astype(str).str.replace(";", ",")
-    mask_multi = df[col].str.contains(",", na=False)
-
-    df_single = df[~mask_multi].copy()
-    df_multi  = df[mask_multi].copy()
-
-    df_multi[col] = df_multi[col].str.split(",")
-    df_multi = df_multi.explode(col)
-    df_multi[col] = df_multi[col].str.strip()
-
-    df_out = pd.concat([df_single, df_multi], ignore_index=True)
-    df_out = df_out[df_out[col] != ""]
-    return df_out
-
 def summarize_by_year(df: pd.DataFrame, col: str = COL_RESPUESTA) -> pd.DataFrame:
+    """
+    n y % dentro del año para un DataFrame ya cargado (p. ej. tras las
+    normalizaciones por especificación). Para la categoría completa usar
+    load_summary_by_year, que lo calcula en Postgres.
+    """
     if df.empty:
         return pd.DataFrame(columns=[COL_YEAR, col, "n", "pct"])
 
     out = (
-        df.groupby([COL_YEAR, col])
+        df.groupby([COL_YEAR, col], observed=True)
         .size()
         .reset_index(name="n")
     )
     out["total_year"] = out.groupby(COL_YEAR)["n"].transform("sum")
     out["pct"] = out["n"] / out["total_year"] * 100
-    out["pct"] = out["pct"].apply(fmt_pct)
+    out["pct"] = out["pct"].round(2).fillna(0.0)
     return out
 
 
@@ -306,38 +431,41 @@ def normalize_respuesta_using_label(df: pd.DataFrame) -> pd.DataFrame:
     Si la respuesta es solo un número y label_es empieza con ese número,
     usamos label_es como respuesta. Así se juntan '1' y
     '1 Completamente insatisfecho' en una sola categoría.
+    Devuelve un frame nuevo (assign) sin copiar las demás columnas.
     """
-    df = df.copy()
     if COL_RESPUESTA not in df.columns:
         return df
 
     if COL_LABEL_ES not in df.columns:
-        df[COL_RESPUESTA] = df[COL_RESPUESTA].astype(str).str.strip()
-        return df
-
-    def _norm(row):
-        resp = "" if pd.isna(row[COL_RESPUESTA]) else str(row[COL_RESPUESTA]).strip()
-        label = "" if pd.isna(row[COL_LABEL_ES]) else str(row[COL_LABEL_ES]).strip()
-
-        # respuesta es numérica y label_es empieza con ese número
-        if resp and resp.isdigit() and label:
-            if label.startswith(resp + " ") or label == resp:
-                return label
-
-        # respuesta vacía pero label_es sí tiene algo
-        if (resp == "" or resp.lower() in ("nan", "none")) and label:
-            return label
-
-        return resp
-
-    df[COL_RESPUESTA] = df.apply(_norm, axis=1)
-    df[COL_RESPUESTA] = df[COL_RESPUESTA].astype(str).str.strip()
-    return df
+        return df.assign(**{COL_RESPUESTA: df[COL_RESPUESTA].astype(str).str.strip()})
+
+    resp = df[COL_RESPUESTA].astype("string").str.strip().fillna("")
+    label = df[COL_LABEL_ES].astype("string").str.strip().fillna("")
+    has_label = label.ne("")
+
+    # respuesta es numérica y label_es empieza con ese número
+    # (primer token de label_es igual a la respuesta)
+    is_digit = resp.str.fullmatch(r"\d+").fillna(False)
+    label_starts = label.str.split(" ", n=1).str[0].eq(resp)
+
+    # respuesta vacía pero label_es sí tiene algo
+    resp_empty = resp.str.lower().isin(["", "nan", "none"])
+
+    nueva = pd.Series(
+        np.where(
+            is_digit & label_starts & has_label,
+            label,
+            np.where(resp_empty & has_label, label, resp),
+        ),
+        index=df.index,
+    )
+    return df.assign(**{COL_RESPUESTA: nueva.astype(str).str.strip()})
 
 # ==========================================
 # MAPAS
 # ==========================================
 
+@lru_cache(maxsize=512)
 def normalizar_nombre(s: str) -> str:
     if s is None:
         return None
@@ -350,97 +478,194 @@ def normalizar_nombre(s: str) -> str:
         s = s.replace("  ", " ")
     return s
 
-#@st.cache_data(show_spinner=False)
+# 3 decimales ≈ 110 m: sobra para un mapa por departamento y reduce
+# puntos y dígitos de lo que se manda al navegador en cada mapa
+GEOJSON_DECIMALES = 3
+
+def _simplificar_anillo(anillo, decimales: int = GEOJSON_DECIMALES) -> list:
+    """
+    Redondea las coordenadas a la grilla y quita puntos consecutivos
+    repetidos. Como es determinista por vértice, los bordes compartidos
+    entre departamentos quedan iguales y no se abren huecos.
+    """
+    puntos = []
+    for x, y, *_ in anillo:
+        p = [round(x, decimales), round(y, decimales)]
+        if not puntos or puntos[-1] != p:
+            puntos.append(p)
+    return puntos
+
+def _simplificar_geometria(geom: dict) -> dict:
+    """Polygon / MultiPolygon simplificado; descarta anillos degenerados."""
+    def poligono(anillos):
+        anillos = [_simplificar_anillo(a) for a in anillos]
+        if not anillos or len(anillos[0]) < 4:
+            return None
+        return [a for a in anillos if len(a) >= 4]
+
+    if geom.get("type") == "Polygon":
+        coords = poligono(geom["coordinates"])
+        if coords is not None:
+            return {"type": "Polygon", "coordinates": coords}
+    elif geom.get("type") == "MultiPolygon":
+        coords = [c for c in map(poligono, geom["coordinates"]) if c is not None]
+        if coords:
+            return {"type": "MultiPolygon", "coordinates": coords}
+    return geom
+
+@st.cache_resource(show_spinner=False)
 def load_guate_geojson():
+    """
+    Devuelve (geojson, geo_df). geo_df relaciona el nombre normalizado
+    (depto_norm) con el nombre original del GeoJSON (depto_geo) y se
+    arma una sola vez para todos los mapas.
+    """
     if not GEOJSON_PATH.exists():
-        return None
+        return None, None
     with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
         gj = json.load(f)
-    for feat in gj.get("features", []):
-        props = feat.get("properties", {})
-        name = props.get("NAME_1")
-        props["NAME_STD"] = normalizar_nombre(name)
-    return gj
+    features = gj.get("features", [])
+    geo_df = pd.DataFrame.from_records(
+        ((f.get("properties", {}).get("NAME_1"),) for f in features),
+        columns=["depto_geo"],
+    )
+    geo_df.insert(0, "depto_norm", geo_df["depto_geo"].map(normalizar_nombre))
+
+    # featureidkey del choropleth; es la única propiedad que usa el mapa,
+    # el resto (GID_1, HASC_1, ...) solo engordaría lo que se manda al navegador
+    for feat, name_std in zip(features, geo_df["depto_norm"]):
+        feat["properties"] = {"NAME_STD": name_std}
+        if feat.get("geometry"):
+            feat["geometry"] = _simplificar_geometria(feat["geometry"])
+    return gj, geo_df
 
 def build_depto_map_df(
     df_map: pd.DataFrame,
     col_depto: str,
     col_resp: str,
     resp_value: str,
-    guate_geo: dict,
+    geo_df: pd.DataFrame,
+    col_n: str = None,
 ) -> pd.DataFrame:
+    """
+    % por departamento de quienes eligieron resp_value.
+    df_map puede traer una fila por respuesta o, si se pasa col_n,
+    conteos ya agregados (se suman en vez de contar filas).
+    """
     if df_map.empty or col_depto is None:
         return pd.DataFrame()
 
-    df_map = df_map.copy()
-    df_map["respuesta_norm"] = df_map[col_resp].astype(str).str.strip()
-    df_map["depto_norm"] = df_map[col_depto].apply(normalizar_nombre)
-
-    totals_dep = (
-        df_map
-        .groupby("depto_norm")
-        .size()
-        .reset_index(name="total_dep")
+    # pocos departamentos distintos: normalizamos solo los valores únicos
+    deptos = df_map[col_depto]
+    deptos_unicos = deptos.dropna().unique()
+    respuesta_norm = df_map[col_resp].astype(str).str.strip()
+    peso = df_map[col_n] if col_n else 1
+    df_map = df_map.assign(
+        depto_norm=deptos.map(
+            dict(zip(deptos_unicos, map(normalizar_nombre, deptos_unicos)))
+        ),
+        peso=peso,
+        is_resp=(respuesta_norm == resp_value).astype("int8") * peso,
     )
 
-    df_resp = df_map[df_map["respuesta_norm"] == resp_value].copy()
-    counts_resp = (
-        df_resp
-        .groupby("depto_norm")
-        .size()
-        .reset_index(name="n")
+    # total y respuestas elegidas por depto en un solo groupby
+    summary_dep = (
+        df_map
+        .groupby("depto_norm", observed=True)
+        .agg(total_dep=("peso", "sum"), n=("is_resp", "sum"))
+        .reset_index()
     )
-
-    summary_dep = totals_dep.merge(counts_resp, on="depto_norm", how="left")
-    summary_dep["n"] = summary_dep["n"].fillna(0)
     summary_dep["pct"] = summary_dep["n"] / summary_dep["total_dep"] * 100
 
+    # nombre a mostrar: el primero que aparece para cada depto
     first_names = (
-        df_map
-        .groupby("depto_norm")[col_depto]
-        .first()
-        .reset_index()
+        df_map[["depto_norm", col_depto]]
+        .dropna(subset=["depto_norm"])
+        .drop_duplicates("depto_norm")
     )
     summary_dep = summary_dep.merge(first_names, on="depto_norm", how="left")
 
-    rows_geo = []
-    for feat in guate_geo.get("features", []):
-        props = feat.get("properties", {})
-        rows_geo.append({
-            "depto_norm": props.get("NAME_STD"),
-            "depto_geo": props.get("NAME_1"),
-        })
-    geo_df = pd.DataFrame(rows_geo)
-
     full_map = geo_df.merge(summary_dep, on="depto_norm", how="left")
-    full_map["label_depto"] = full_map[col_depto].fillna(full_map["depto_geo"])
-    full_map["n"] = full_map["n"].fillna(0)
-    full_map["total_dep"] = full_map["total_dep"].fillna(0)
-    full_map["pct"] = full_map["pct"].fillna(0)
-    full_map["pct"] = full_map["pct"].apply(fmt_pct)
+    # col_depto puede venir como category: se pasa a object para rellenar
+    full_map["label_depto"] = full_map[col_depto].astype(object).fillna(full_map["depto_geo"])
+    full_map = full_map.fillna({"n": 0, "total_dep": 0, "pct": 0})
+    full_map["pct"] = full_map["pct"].round(2)
     return full_map
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_depto_map_cached(
+    map_key: tuple,
+    _df_map: pd.DataFrame,
+    resp_value: str,
+    col_n: str = None,
+) -> pd.DataFrame:
+    """
+    build_depto_map_df en caché. map_key = (agrupacion, categoria,
+    especificación o None, año) identifica a _df_map, que no se hashea
+    (el _ lo excluye de la llave): volver a un año/respuesta ya vistos
+    es una consulta al diccionario de la caché.
+    _df_map trae todos los años; el recorte al año de map_key solo se
+    hace cuando hay que calcular.
+    """
+    _, geo_df = load_guate_geojson()
+    year = map_key[-1]
+    return build_depto_map_df(
+        _df_map[_df_map[COL_YEAR] == year],
+        COL_DEPTO, COL_RESPUESTA, resp_value, geo_df, col_n=col_n,
+    )
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_depto_table(full_map: pd.DataFrame) -> pa.Table:
+    """
+    Tabla por departamento lista para st.dataframe, ya como tabla Arrow:
+    en caché, así los reruns no repiten la conversión pandas → Arrow.
+    """
+    tabla = (
+        full_map[["label_depto", "n", "total_dep", "pct"]]
+        .sort_values("pct", ascending=False)
+        .rename(columns={
+            "label_depto": "Departamento",
+            "n": "N respuesta",
+            "total_dep": "Total depto",
+            "pct": "% respuesta",
+        })
+    )
+    return pa.Table.from_pandas(tabla, preserve_index=False)
+
 # ==========================================
 # ICONOS
 # ==========================================
 
+# (palabra clave, icono) en orden de prioridad; gana la primera coincidencia
+_GROUP_ICON_RULES = (
+    ("demographic", "fa-solid fa-users"),
+    ("economic", "fa-solid fa-coins"),
+    ("ethical", "fa-solid fa-scale-balanced"),
+    ("happiness", "fa-solid fa-face-smile-beam"),
+    ("wellbeing", "fa-solid fa-face-smile-beam"),
+    ("postmaterialism", "fa-solid fa-seedling"),
+    ("science", "fa-solid fa-flask"),
+    ("technology", "fa-solid fa-flask"),
+    ("corruption", "fa-solid fa-triangle-exclamation"),
+    ("migration", "fa-solid fa-plane-departure"),
+    ("security", "fa-solid fa-shield-halved"),
+    ("political culture", "fa-solid fa-landmark"),
+    ("regimes", "fa-solid fa-landmark"),
+    ("political interest", "fa-solid fa-person-chalkboard"),
+    ("participation", "fa-solid fa-person-chalkboard"),
+    ("religious", "fa-solid fa-church"),
+    ("social capital", "fa-solid fa-handshake"),
+    ("organizational membership", "fa-solid fa-handshake"),
+    ("stereotypes", "fa-solid fa-brain"),
+    ("norms", "fa-solid fa-brain"),
+)
+
 def fa_icon_for_group(agr: str) -> str:
     s = agr.lower()
-    if "demographic" in s: return "fa-solid fa-users"
-    if "economic" in s: return "fa-solid fa-coins"
-    if "ethical" in s: return "fa-solid fa-scale-balanced"
-    if "happiness" in s or "wellbeing" in s: return "fa-solid fa-face-smile-beam"
-    if "postmaterialism" in s: return "fa-solid fa-seedling"
-    if "science" in s or "technology" in s: return "fa-solid fa-flask"
-    if "corruption" in s: return "fa-solid fa-triangle-exclamation"
-    if "migration" in s: return "fa-solid fa-plane-departure"
-    if "security" in s: return "fa-solid fa-shield-halved"
-    if "political culture" in s or "regimes" in s: return "fa-solid fa-landmark"
-    if "political interest" in s or "participation" in s: return "fa-solid fa-person-chalkboard"
-    if "religious" in s: return "fa-solid fa-church"
-    if "social capital" in s or "organizational membership" in s: return "fa-solid fa-handshake"
-    if "stereotypes" in s or "norms" in s: return "fa-solid fa-brain"
-    return "fa-solid fa-chart-line"
+    return next(
+        (icon for kw, icon in _GROUP_ICON_RULES if kw in s),
+        "fa-solid fa-chart-line",
+    )
 
 # ==========================================
 # ICONOS POR CATEGORÍA DENTRO DE CADA AGRUPACIÓN
@@ -626,6 +851,13 @@ CATEGORY_ICON_MAP = {
     },
 }
 
+# búsqueda directa (agrupación, categoría) sin distinguir mayúsculas
+_FLAT_CAT_ICONS = {
+    (agr.casefold(), cat.casefold()): icon
+    for agr, sub in CATEGORY_ICON_MAP.items()
+    for cat, icon in sub.items()
+}
+
 def category_icon_for(agrupacion: str, categoria: str) -> str:
     """
     Devuelve el icono Font Awesome para una categoría específica
@@ -636,11 +868,10 @@ def category_icon_for(agrupacion: str, categoria: str) -> str:
     if categoria == "GPN":
         return "fa-solid fa-globe"
 
-    agr_map = CATEGORY_ICON_MAP.get(agrupacion, {})
-    icon = agr_map.get(categoria)
-    if icon:
-        return icon
-    return "fa-solid fa-list-ul"
+    return _FLAT_CAT_ICONS.get(
+        (agrupacion.casefold(), categoria.casefold()),
+        "fa-solid fa-list-ul",
+    )
 
 # ==========================================
 # TARJETAS AGRUPACIONES
@@ -721,26 +952,66 @@ def pick_best_respuesta_column(df: pd.DataFrame) -> str:
 
 DEMOGRAPHIC_KEY_CATEGORIES = ["Age", "Marital status", "Sex"]
 
-def load_demographic_distribution(categoria: str) -> pd.DataFrame:
+# categorías demográficas que no se muestran como tarjetas
+_DEMOG_EXCLUDED = frozenset({
+    "Age",
+    "Country of birth",
+    "Ethnic group",
+    "Marital status",
+    "Sex",
+    "Year of birth",
+})
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_demographic_overview_all(
+    categorias: tuple = tuple(DEMOGRAPHIC_KEY_CATEGORIES),
+) -> pd.DataFrame:
+    """
+    Conteos de las categorías demográficas en una sola consulta.
+    Cada render recibe su parte ya filtrada por categoría.
+    El % dentro del año y el filtro de < PCT_MIN_2025 en 2025 se
+    resuelven en Postgres, sobre los conteos de la vista materializada
+    PG_MV_CAT (o su respaldo, ver conteos_relation). El rango de edad (0 a 100) se aplica en render_age_plot,
+    sobre la respuesta que efectivamente se grafica.
+    """
     query = text(f"""
-        SELECT
-            {COL_YEAR},
-            {COL_RESPUESTA} AS respuesta,
-            respuesta_grafica,
-            respuesta_normalizada,
-            COUNT(*) AS n
-        FROM "{PG_SCHEMA}".{PG_TABLE}
-        WHERE {COL_AGRUP} = 'Demographic and Socioeconomic'
-          AND {COL_CATEGORIA}   = :cat
-          AND {COL_RESPUESTA} IS NOT NULL
-          AND {COL_YEAR} IN (2020, 2025)
-        GROUP BY {COL_YEAR}, {COL_RESPUESTA},
-                 respuesta_grafica, respuesta_normalizada
-        ORDER BY {COL_YEAR}, n DESC;
+        WITH conteos AS (
+            SELECT
+                {COL_YEAR},
+                {COL_CATEGORIA} AS categoria,
+                {COL_RESPUESTA} AS respuesta,
+                respuesta_grafica,
+                respuesta_normalizada,
+                SUM(n)::bigint AS n,
+                (SUM(SUM(n)) OVER (PARTITION BY {COL_CATEGORIA}, {COL_YEAR}))::bigint AS total_year
+            FROM {conteos_relation()}
+            WHERE {COL_AGRUP} = 'Demographic and Socioeconomic'
+              AND {COL_CATEGORIA} = ANY(:cats)
+            GROUP BY {COL_YEAR}, {COL_CATEGORIA}, {COL_RESPUESTA},
+                     respuesta_grafica, respuesta_normalizada
+        ),
+        pcts AS (
+            SELECT *, ROUND(n::numeric * 100 / total_year, 2)::float8 AS pct
+            FROM conteos
+        )
+        SELECT *
+        FROM pcts
+        WHERE {COL_YEAR} <> 2025 OR pct >= :pct_min
+        ORDER BY categoria, {COL_YEAR}, n DESC;
     """)
-    with engine.connect() as conn:
-        df = pd.read_sql(query, conn, params={"cat": categoria})
+    with get_engine().connect() as conn:
+        df = pd.read_sql(
+            query, conn,
+            params={"cats": list(categorias), "pct_min": PCT_MIN_2025},
+        )
+    return df
+
 
+def prepare_demographic_distribution(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recibe los conteos de UNA categoría demográfica (ya con pct y filtros
+    aplicados en SQL) y elige la respuesta a mostrar.
+    """
     if df.empty:
         return df
 
@@ -756,26 +1027,17 @@ def load_demographic_distribution(categoria: str) -> pd.DataFrame:
     )
 
     df[COL_RESPUESTA] = df[COL_RESPUESTA].astype(str).str.strip()
-
-    # calcular porcentajes
-    df["total_year"] = df.groupby(COL_YEAR)["n"].transform("sum")
-    df["pct"] = (df["n"] / df["total_year"] * 100).round(2)
-
-    # filtro: quitar categorías < 0.5% en 2025
-    df = df[~((df[COL_YEAR] == 2025) & (df["pct"] < PCT_MIN_2025))]
-
     return df
 
 
 
-def render_age_plot():
-    df = load_demographic_distribution("Age")
+def render_age_plot(df: pd.DataFrame):
     if df.empty:
         st.info("No se encontraron datos para Age.")
         return
 
     df["edad"] = pd.to_numeric(df["respuesta"], errors="coerce")
-    df = df[(df["edad"].notna()) & (df["edad"] >= 0) & (df["edad"] <= 100)]
+    df = df[df["edad"].between(0, 100)]
     if df.empty:
         st.info("No hay datos de edad válidos entre 0 y 100 años.")
         return
@@ -810,8 +1072,7 @@ def render_age_plot():
     )
     st.plotly_chart(fig, use_container_width=True)
 
-def render_categorical_plot(categoria: str):
-    df = load_demographic_distribution(categoria)
+def render_categorical_plot(categoria: str, df: pd.DataFrame):
     if df.empty:
         st.info(f"No se encontraron datos para {categoria}.")
         return
@@ -854,31 +1115,507 @@ def render_categorical_plot(categoria: str):
 def render_demographic_overview():
     st.markdown("### Resumen demográfico (2020 vs 2025)")
     tab_age, tab_marital, tab_sex = st.tabs(DEMOGRAPHIC_KEY_CATEGORIES)
+
+    df_all = load_demographic_overview_all()
+    by_cat = {
+        cat: prepare_demographic_distribution(
+            df_all[df_all["categoria"] == cat].drop(columns="categoria")
+        )
+        for cat in DEMOGRAPHIC_KEY_CATEGORIES
+    }
+
     with tab_age:
-        render_age_plot()
+        render_age_plot(by_cat["Age"])
     with tab_marital:
-        render_categorical_plot("Marital status")
+        render_categorical_plot("Marital status", by_cat["Marital status"])
     with tab_sex:
-        render_categorical_plot("Sex")
+        render_categorical_plot("Sex", by_cat["Sex"])
     st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
+# ==========================================
+# NORMALIZACIONES POR ESPECIFICACIÓN
+# (vectorizadas: reciben la Serie de respuestas y devuelven otra Serie)
+# ==========================================
+
+OTRAS = "Otras respuestas"
+
+def _texto(ser: pd.Series) -> pd.Series:
+    """
+    Respuesta en minúsculas y sin espacios en los extremos. Se calcula una
+    vez por normalización y todas las pruebas (.str.contains, isin, ...)
+    trabajan sobre este resultado.
+    """
+    return ser.astype(str).str.strip().str.lower()
+
+def _texto_compacto(ser: pd.Series) -> pd.Series:
+    """Como _texto, pero colapsando espacios repetidos."""
+    return _texto(ser).str.replace(r"\s+", " ", regex=True)
+
+def _contiene(s: pd.Series, pat) -> pd.Series:
+    """pat: patrón precompilado o texto literal (este último sin regex)."""
+    regex = isinstance(pat, re.Pattern)
+    return s.str.contains(pat, regex=regex).fillna(False).astype(bool)
+
+def _digitos(s: pd.Series, pat: re.Pattern) -> pd.Series:
+    """Primer grupo numérico de pat como texto sin ceros a la izquierda ('07' → '7')."""
+    d = s.str.extract(pat, expand=False)
+    return d.str.lstrip("0").replace("", "0")
+
+def _select(ser: pd.Series, reglas: list, default: str = OTRAS) -> pd.Series:
+    """
+    reglas: lista de (condición, valor) en orden de prioridad; gana la
+    primera condición que se cumple (igual que la cadena de if originales).
+    """
+    conds = [
+        np.broadcast_to(np.asarray(cond, dtype=bool), len(ser)) for cond, _ in reglas
+    ]
+    choices = [
+        valor.to_numpy(dtype=object, na_value=None) if isinstance(valor, pd.Series) else valor
+        for _, valor in reglas
+    ]
+    return pd.Series(
+        np.select(conds, choices, default=default),
+        index=ser.index,
+    )
+
+_SIN_TILDES = str.maketrans("áéíóú", "aeiou")
+
+def _sin_tildes(s: pd.Series) -> pd.Series:
+    """Quita las tildes de las vocales en una sola pasada."""
+    return s.str.translate(_SIN_TILDES)
+
+def normalize_codigo_pais(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    return _select(ser, [(_contiene(s, _RE_GUATEMALA), "Guatemala")])
+
+def normalize_situacion_mujer(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    return _select(ser, [
+        (_contiene(s, "mujer gestante"), "Mujer gestante"),
+        (_contiene(s, "madre lactante"), "Madre lactante"),
+        (_contiene(s, "mujer no gestante"), "Mujer no gestante"),
+        (_contiene(s, _RE_TIENE_NINO), "Tiene niño/a"),
+        (_contiene(s, _RE_HOMBRE), "Hombre"),
+    ])
+
+def normalize_hijos_value(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    d = _digitos(s, _RE_DIGITS)
+    n = pd.to_numeric(d, errors="coerce")
+    return _select(ser, [
+        (_contiene(s, "2 o 3"), "3"),
+        (n.le(10), d),
+    ])
+
+def normalize_edad_educ(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    d = _digitos(s, _RE_DIGITS)
+    edad = pd.to_numeric(d, errors="coerce")
+    return _select(ser, [
+        (_contiene(s, _RE_NO_ESTUDIA), "No estudia / no completará"),
+        (_contiene(s, _RE_NO_INDICA), "No indica"),
+        (_contiene(s, _RE_NO_RECUERDA), "No sabe / no recuerda"),
+        (_contiene(s, "no aplica"), "No aplica"),
+        (edad.between(5, 80), d),
+    ])
+
+def normalize_nivel_educ(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    universidad = _contiene(s, _RE_UNIVERSIDAD)
+    return _select(ser, [
+        (s.str.startswith("0"), "0 Sin educación / preescolar"),
+        (s.str.startswith("1"), "1 Primaria"),
+        (s.str.startswith("2"), "2 Básica / primer ciclo"),
+        (s.str.startswith("3"), "3 Secundaria / diversificado"),
+        (universidad & s.str.startswith("5"), "5 Postgrado"),
+        (universidad, "4 Licenciatura / universitario"),
+    ])
+
+def normalize_tiempo_salud(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    mins = _digitos(s, _RE_MINS)
+    horas = _digitos(s, _RE_HORAS)
+    return _select(ser, [
+        (_contiene(s, _RE_5_MIN), "5 minutos"),
+        (_contiene(s, _RE_10_MIN), "10 minutos"),
+        (_contiene(s, "15 minutos"), "15 minutos"),
+        (_contiene(s, "20 minutos"), "20 minutos"),
+        (_contiene(s, _RE_30_MIN), "30 minutos"),
+        (_contiene(s, _RE_1_HORA), "1 hora"),
+        (_contiene(s, _RE_2_HORAS), "2 horas"),
+        (_contiene(s, "4 horas"), "4 horas"),
+        (_contiene(s, _RE_MAS_6_HORAS), "Más de 6 horas"),
+        (_contiene(s, _RE_MENOS_1_HORA) | s.eq("menos"), "Menos de 1 hora"),
+        (_contiene(s, _RE_NO_SABE_SALUD), "No indica / no sabe"),
+        (mins.notna(), mins + " minutos"),
+        (horas.eq("1"), "1 hora"),
+        (horas.notna(), horas + " horas"),
+    ])
+
+def normalize_expectativas_centro(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    return _select(ser, [
+        (_contiene(s, _RE_AYUDA), "Ayuda / apoyo"),
+        (_contiene(s, _RE_ATENCION), "Buena atención / servicio"),
+        (_contiene(s, "medic"), "Medicamentos"),
+        (_contiene(s, "aliment"), "Plan de alimentación"),
+        (_contiene(s, _RE_MEDICA), "Atención médica"),
+        (s.isin(["si", "sí", "s", ".", ""]), "No especifica / sí"),
+    ])
+
+def normalize_intencion_voto(ser: pd.Series) -> pd.Series:
+    s = _texto(ser)
+    return _select(ser, [
+        (_contiene(s, "semilla"), "Movimiento Semilla"),
+        (_contiene(s, _RE_UNE) | s.eq("une"), "UNE"),
+        (_contiene(s, "valor"), "Valor"),
+        (_contiene(s, _RE_PAN) | s.eq("pan"), "PAN"),
+        (_contiene(s, "winaq"), "Winaq"),
+        (_contiene(s, _RE_NO_SABE), "No sabe"),
+        (_contiene(s, _RE_NINGUNO), "Ninguno / nadie"),
+        (_contiene(s, "confidencial"), "Confidencial"),
+    ], default="Otros partidos")
+
+def normalize_likert_agreement(ser: pd.Series) -> pd.Series:
+    """
+    Escala de acuerdo (muy/totalmente se unifican en 'Totalmente').
+    La comparten todas las preguntas de acuerdo/desacuerdo.
+    """
+    s = _texto(ser)
+    muy_total = _contiene(s, _RE_MUY_TOTAL)
+    desacuerdo = _contiene(s, "desacuerdo")
+    acuerdo = _contiene(s, "acuerdo")
+    return _select(ser, [
+        (_contiene(s, _RE_NS_NR), "No sabe / No responde"),
+        (_contiene(s, _RE_NEUTRO), "Ni de acuerdo ni en desacuerdo"),
+        (muy_total & desacuerdo, "Totalmente en desacuerdo"),
+        (desacuerdo, "En desacuerdo"),
+        (muy_total & acuerdo, "Totalmente de acuerdo"),
+        (_contiene(s, "de acuerdo"), "De acuerdo"),
+    ])
+
+def normalize_important_in_life(ser: pd.Series) -> pd.Series:
+    s = _texto_compacto(ser)
+    # OJO: "no muy importante" debe ir antes que "muy importante"
+    return _select(ser, [
+        (_contiene(s, "no muy importante"), "No muy importante"),
+        (_contiene(s, "muy importante"), "Muy importante"),
+        (_contiene(s, "bastante importante"), "Bastante importante"),
+        (_contiene(s, "nada importante"), "Nada importante"),
+    ])
+
+# Mapeo a etiqueta estándar (lo que se quiere ver en la gráfica)
+CHILD_QUALITIES_MAP = {
+    "buenos modales": "Buenos modales",
+    "sentido de responsabilidad": "Sentido de responsabilidad",
+    "tolerancia y respeto hacia otros": "Tolerancia y respeto hacia otros",
+    "tolerancia respeto hacia otros": "Tolerancia y respeto hacia otros",
+    "obediencia": "Obediencia",
+    "fe religiosa": "Fe religiosa",
+    "fe religosa": "Fe religiosa",
+    "independencia": "Independencia",
+    "trabajo duro/dedicacion al trabajo": "Trabajo duro / dedicación al trabajo",
+    "trabajo duro dedicacion al trabajo": "Trabajo duro / dedicación al trabajo",
+    "determinacion/perseverancia": "Determinación / perseverancia",
+    "determinacion perseverancia": "Determinación / perseverancia",
+    "generosidad": "Generosidad",
+    "altruismo": "Altruismo",
+    "imaginacion": "Imaginación",
+    "sentido de la economia y espiritu de ahorro": "Sentido de la economía y espíritu de ahorro",
+    "sentido de la economia espiritu de ahorro": "Sentido de la economía y espíritu de ahorro",
+}
+
+def normalize_child_qualities(ser: pd.Series) -> pd.Series:
+    s = _texto_compacto(ser)
+    no_sabe = _contiene(s, _RE_NS_NR)
+
+    # Normalizaciones generales (tildes/variantes típicas)
+    clave = _sin_tildes(s)
+    for antes, despues in ((" / ", "/"), (" /", "/"), ("/ ", "/"), (" y ", " "), ("&", " ")):
+        clave = clave.str.replace(antes, despues, regex=False)
+    clave = clave.str.replace(r"\s+", " ", regex=True).str.strip()
+    estandar = clave.map(CHILD_QUALITIES_MAP)
+
+    # fallback: la respuesta original si no estaba en el mapa
+    return _select(ser, [
+        (no_sabe, "No sabe / No responde"),
+        (estandar.notna(), estandar),
+        (True, ser.astype(str).str.strip()),
+    ])
+
+def normalize_future_respect_authority(ser: pd.Series) -> pd.Series:
+    s = _texto_compacto(ser)
+    # tildes mínimas (por si viene "importaría"), después del chequeo de no sabe
+    s_plano = _sin_tildes(s)
+    return _select(ser, [
+        (_contiene(s, _RE_NS_NR), "No sabe / No responde"),
+        (s_plano.isin(["bueno", "bien", "good"]), "Bueno"),
+        (s_plano.isin(["malo", "mal", "bad"]), "Malo"),
+        (_contiene(s_plano, _RE_NO_ME_IMPORTA) | s_plano.eq("no importa"), "No me importa"),
+        (_contiene(s_plano, _RE_NO_LE_IMPORTA), "No me importa"),
+    ])
+
+def normalizer_for_spec(label_lower: str, categoria: str):
+    """
+    Devuelve la normalización vectorizada que corresponde a una
+    especificación (por su texto) o None si se deja la respuesta tal cual.
+    """
+    # 0) CÓDIGO del país: Entrevistado, Madre, Padre → Guatemala / Otras
+    if ("código del país" in label_lower) and ("entrevistado, madre, padre" in label_lower):
+        return normalize_codigo_pais
+    # 1) Situación actual si eres mujer
+    if "situación actual si eres mujer" in label_lower:
+        return normalize_situacion_mujer
+    # 2) ¿Cuántos hijos cree usted que debieran tener los hogares…?
+    if "cuántos hijos cree usted" in label_lower:
+        return normalize_hijos_value
+    # 3) ¿A qué edad completó (o completará) su educación a tiempo completo…?
+    if "a qué edad completó (o completará) su educación a tiempo completo" in label_lower:
+        return normalize_edad_educ
+    # 4) ¿Cuál es el nivel educativo más alto que usted, su cónyuge, su madre y su padre han alcanzado?
+    if "nivel educativo más alto que usted, su cónyuge, su madre y su padre han alcanzado" in label_lower:
+        return normalize_nivel_educ
+    # 5) ¿Cuánto le toma llegar al centro de salud más cercano?
+    if "cuánto le toma llegar al centro de salud más cercano" in label_lower:
+        return normalize_tiempo_salud
+    # 6) De todo lo que hemos platicado, ¿qué esperaría de un centro de Salud nutricional…?
+    if "centro de salud nutricional para sus hijos" in label_lower:
+        return normalize_expectativas_centro
+    # 7) Si mañana hubiera elecciones, ¿por cuál partido votaría usted…?
+    if "si mañana hubiera elecciones" in label_lower and "por cuál partido votaría" in label_lower:
+        return normalize_intencion_voto
+    # 8) Escalas de acuerdo: mujer que gana más que su marido, jobs scarce,
+    #    men should have more right, children duty / cuidado continuo
+    if LIKERT_LABEL_PATTERNS.search(label_lower):
+        return normalize_likert_agreement
+    if categoria.strip().lower() == "important in life":
+        return normalize_important_in_life
+    # Important child qualities (multi-select: hasta cinco)
+    if (
+        "important child qualities" in label_lower
+        or "cualidades que pueden fomentarse en el hogar" in label_lower
+        or "cualidades" in label_lower and "hasta cinco" in label_lower
+    ):
+        return normalize_child_qualities
+    # Future changes – Greater respect for authority
+    if (
+        "greater respect for authority" in label_lower
+        or ("future changes" in label_lower and "respect for authority" in label_lower)
+    ):
+        return normalize_future_respect_authority
+    return None
+
 # ==========================================
 # DASHBOARD POR CATEGORÍA (incluye mapas y especificaciones)
 # ==========================================
 
-def load_data_for_categoria(agrupacion: str, categoria: str) -> pd.DataFrame:
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_all_for_agrupacion(agrupacion: str) -> pd.DataFrame:
+    """
+    Filas de TODAS las categorías de la agrupación con las respuestas
+    multiselección ya separadas en Postgres (string_to_array + unnest),
+    una fila por opción elegida. Una sola consulta por agrupación: moverse
+    entre sus categorías ya no vuelve a la base.
+    Se lee con backend pyarrow (vía connectorx si está instalado).
+    agrupacion viene del parámetro ?agr= de la URL y connectorx la
+    recibe como literal: solo se consulta si está en load_agrupaciones().
+    """
     q = text(f"""
-        SELECT *
-        FROM "{PG_SCHEMA}".{PG_TABLE}
+        SELECT
+            {COL_CATEGORIA},
+            {COL_YEAR},
+            {COL_RESPONDENT},
+            {COL_DEPTO},
+            {COL_ESPECIF},
+            {COL_LABEL_ES},
+            trim(r.resp) AS {COL_RESPUESTA}
+        FROM "{PG_SCHEMA}".{PG_TABLE},
+             unnest(string_to_array(replace({COL_RESPUESTA}, ';', ','), ',')) AS r(resp)
         WHERE {COL_AGRUP} = :agr
-          AND {COL_CATEGORIA} = :cat
           AND {COL_RESPUESTA} IS NOT NULL
-          AND {COL_YEAR} IN (2020, 2025);
+          AND {COL_YEAR} IN (2020, 2025)
+          AND trim(r.resp) <> '';
+    """)
+    if agrupacion in load_agrupaciones():
+        df = read_sql_arrow(q, {"agr": agrupacion}, partition_on=COL_YEAR)
+    else:
+        df = pd.DataFrame(columns=[
+            COL_CATEGORIA, COL_YEAR, COL_RESPONDENT, COL_DEPTO,
+            COL_ESPECIF, COL_LABEL_ES, COL_RESPUESTA,
+        ])
+
+    # columnas repetitivas (pocos valores distintos) como category;
+    # respuesta se queda como string[pyarrow] para las operaciones .str
+    cat_cols = [c for c in (COL_CATEGORIA, COL_DEPTO, COL_ESPECIF) if c in df.columns]
+    df[cat_cols] = df[cat_cols].astype("category")
+    df[COL_YEAR] = df[COL_YEAR].astype("int16")
+    return df
+
+def load_data_for_categoria(
+    agrupacion: str, categoria: str, df_cat: pd.DataFrame = None
+) -> pd.DataFrame:
+    """
+    Filas de una categoría, recortadas del frame en caché de la agrupación.
+    df_cat: filas de la categoría ya recortadas (p. ej. por el prefetch),
+    para no volver a leer el frame de la agrupación.
+    """
+    if df_cat is None:
+        df_cat = load_all_for_agrupacion(agrupacion)
+        df_cat = df_cat[df_cat[COL_CATEGORIA] == categoria]
+    df = df_cat.drop(columns=COL_CATEGORIA)
+    cat_cols = [c for c in (COL_DEPTO, COL_ESPECIF) if c in df.columns]
+    for c in cat_cols:
+        df[c] = df[c].cat.remove_unused_categories()
+    return df.reset_index(drop=True)
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def prepare_data_for_categoria(
+    agrupacion: str, categoria: str, _df_cat: pd.DataFrame = None
+) -> pd.DataFrame:
+    """
+    Datos de la categoría ya normalizados (respuesta unificada con
+    label_es). Queda en caché, así cada rerun solo filtra este frame.
+    _df_cat no entra en la llave de caché: solo evita releer la agrupación.
+    """
+    df = load_data_for_categoria(agrupacion, categoria, _df_cat)
+    if df.empty:
+        return df
+    df = normalize_respuesta_using_label(df)
+    # respuesta ya viene sin espacios: como category, los selectores leen
+    # las opciones de .cat.categories sin tocar las filas
+    df[COL_RESPUESTA] = df[COL_RESPUESTA].astype("category")
+    return df
+
+# Misma regla que normalize_respuesta_using_label, en SQL, sobre las
+# columnas resp (opción ya separada y sin espacios) y label (label_es limpio)
+SQL_RESPUESTA_NORM = """
+                CASE
+                    WHEN label <> '' AND resp ~ '^[0-9]+$'
+                         AND split_part(label, ' ', 1) = resp THEN label
+                    WHEN label <> '' AND lower(resp) IN ('nan', 'none') THEN label
+                    ELSE resp
+                END"""
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_summary_by_year(agrupacion: str, categoria: str) -> pd.DataFrame:
+    """
+    Versión en SQL de summarize_by_year para la categoría completa:
+    separa multiselección, aplica la misma regla que
+    normalize_respuesta_using_label y calcula n y pct por año con una
+    función de ventana. Lee de la vista materializada PG_MV_CAT (vía
+    conteos_relation), así que solo recorre conteos ya agrupados. Solo viajan filas (year, respuesta).
+    """
+    q = text(f"""
+        WITH resp AS (
+            SELECT
+                {COL_YEAR},
+                trim(r.resp) AS resp,
+                coalesce(trim({COL_LABEL_ES}), '') AS label,
+                n
+            FROM {conteos_relation()},
+                 unnest(string_to_array(replace({COL_RESPUESTA}, ';', ','), ',')) AS r(resp)
+            WHERE {COL_AGRUP} = :agr
+              AND {COL_CATEGORIA} = :cat
+              AND trim(r.resp) <> ''
+        ),
+        norm AS (
+            SELECT
+                {COL_YEAR},
+                {SQL_RESPUESTA_NORM} AS {COL_RESPUESTA},
+                n
+            FROM resp
+        )
+        SELECT
+            {COL_YEAR},
+            {COL_RESPUESTA},
+            SUM(n)::bigint AS n,
+            ROUND(
+                SUM(n)::numeric * 100 / SUM(SUM(n)) OVER (PARTITION BY {COL_YEAR}),
+                2
+            )::float8 AS pct
+        FROM norm
+        GROUP BY {COL_YEAR}, {COL_RESPUESTA};
     """)
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
+        df = pd.read_sql(q, conn, params={"agr": agrupacion, "cat": categoria})
+    # respuesta sin espacios y como category (categorías ya ordenadas);
+    # trim() de SQL solo quita espacios: respuestas que difieren en un tab
+    # o salto de línea final se vuelven una sola y se suman
+    df[COL_RESPUESTA] = df[COL_RESPUESTA].str.strip().astype("category")
+    return (
+        df.groupby([COL_YEAR, COL_RESPUESTA], observed=True, as_index=False)[["n", "pct"]]
+        .sum()
+    )
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def load_depto_summary(agrupacion: str, categoria: str) -> pd.DataFrame:
+    """
+    Conteos por (year, departamento, respuesta) para el mapa general,
+    con la misma separación y normalización que load_summary_by_year.
+    """
+    q = text(f"""
+        WITH resp AS (
+            SELECT
+                {COL_YEAR},
+                {COL_DEPTO},
+                trim(r.resp) AS resp,
+                coalesce(trim({COL_LABEL_ES}), '') AS label
+            FROM "{PG_SCHEMA}".{PG_TABLE},
+                 unnest(string_to_array(replace({COL_RESPUESTA}, ';', ','), ',')) AS r(resp)
+            WHERE {COL_AGRUP} = :agr
+              AND {COL_CATEGORIA} = :cat
+              AND {COL_RESPUESTA} IS NOT NULL
+              AND {COL_YEAR} IN (2020, 2025)
+              AND trim(r.resp) <> ''
+        )
+        SELECT
+            {COL_YEAR},
+            {COL_DEPTO},
+            {SQL_RESPUESTA_NORM} AS {COL_RESPUESTA},
+            COUNT(*) AS n
+        FROM resp
+        GROUP BY 1, 2, 3;
+    """)
+    with get_engine().connect() as conn:
         df = pd.read_sql(q, conn, params={"agr": agrupacion, "cat": categoria})
     return df
 
+def prefetch_categorias(agrupacion: str, categorias: List[str]):
+    """
+    Llena en segundo plano la caché de prepare_data_for_categoria y
+    load_summary_by_year para las categorías de la agrupación, así el
+    clic en una tarjeta ya encuentra los datos cargados.
+    Solo se lanza una vez por agrupación y sesión.
+    """
+    prefetched = st.session_state.setdefault("prefetched_agr", set())
+    if agrupacion in prefetched or not categorias:
+        return
+    prefetched.add(agrupacion)
+
+    ctx = get_script_run_ctx()
+
+    def _load_datos():
+        # un solo hilo: cada lectura de load_all_for_agrupacion desde
+        # st.cache_data es una copia completa, así que se lee una vez y se
+        # parte por categoría con un solo groupby
+        df_agr = load_all_for_agrupacion(agrupacion)
+        por_cat = dict(iter(df_agr.groupby(COL_CATEGORIA, sort=False, observed=True)))
+        for cat in categorias:
+            prepare_data_for_categoria(
+                agrupacion, cat, _df_cat=por_cat.get(cat, df_agr.iloc[:0])
+            )
+
+    # 4 hilos como máximo: caben en el pool de conexiones del engine
+    executor = ThreadPoolExecutor(
+        max_workers=4,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    )
+    executor.submit(_load_datos)
+    for cat in categorias:
+        executor.submit(load_summary_by_year, agrupacion, cat)
+    executor.shutdown(wait=False)
+
+@lru_cache(maxsize=1024)
 def safe_key(base: str) -> str:
     """
     Genera una key "segura" para Streamlit.
@@ -887,6 +1624,147 @@ def safe_key(base: str) -> str:
     """
     return base.replace(" ", "_").replace(":", "_").replace("/", "_")
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def pivot_summary(summary: pd.DataFrame) -> tuple:
+    """
+    Devuelve (tabla, orden): tabla respuesta × año (pct_2020/pct_2025) y
+    el orden de las respuestas por el promedio de los años presentes.
+    Sale de un solo groupby + unstack y queda en caché entre reruns.
+    """
+    # groupby en vez de set_index: unstack falla con claves repetidas
+    pivot = (
+        summary.groupby([COL_RESPUESTA, COL_YEAR], observed=True)["pct"]
+        .sum()
+        .unstack(COL_YEAR)
+    )
+    order = pivot.mean(axis=1).sort_values(ascending=False).index.tolist()
+    tabla = (
+        pivot
+        .fillna(0.0)
+        .reindex(order)
+        .rename(columns={2020: "pct_2020", 2025: "pct_2025"})
+        .reset_index()
+    )
+    return tabla, order
+
+# Las figuras se guardan en caché como dict (fig.to_dict()) y se
+# reconstruyen con go.Figure: así px no rehace trazas y layout en cada rerun.
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_bar_fig(
+    summary: pd.DataFrame,
+    order_resp: tuple,
+    title: str,
+    margin_t: int = 70,
+    margin_b: int = 120,
+) -> dict:
+    """
+    Barras agrupadas 2020 vs 2025 (% dentro del año) por respuesta.
+    Una traza go.Bar por año (sin el mapeo de columnas/colores de px).
+    """
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=sub[COL_RESPUESTA],
+                y=sub["pct"],
+                name=anio,
+                hovertemplate="Respuesta=%{x}<br>% dentro del año=%{y:.2f}<extra></extra>",
+            )
+            for anio, sub in summary.groupby("Año", sort=True)
+        ]
+    )
+    fig.update_xaxes(
+        type="category",
+        categoryorder="array",
+        categoryarray=list(order_resp),
+        title_text="Respuesta",
+    )
+    fig.update_layout(
+        title=title,
+        barmode="group",
+        yaxis=dict(tickformat=".2f", title_text="% dentro del año"),
+        xaxis_tickangle=-30,
+        legend_title_text="Año",
+        margin=dict(t=margin_t, b=margin_b),
+    )
+    return fig.to_dict()
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def build_choropleth_fig(full_map: pd.DataFrame, title: str, n_label: str) -> dict:
+    """
+    Mapa por departamento SIN el geojson (no se guarda en cada entrada
+    de la caché); se le pone con with_geojson al dibujarlo.
+    """
+    fig = px.choropleth(
+        full_map,
+        locations="depto_norm",
+        featureidkey="properties.NAME_STD",
+        color="pct",
+        color_continuous_scale="Blues",
+        hover_data={
+            "label_depto": True,
+            "n": True,
+            "total_dep": True,
+            "pct": ':.2f',
+        },
+        labels={
+            "pct": "% que eligió la respuesta",
+            "label_depto": "Departamento",
+            "n": n_label,
+            "total_dep": "Total respuestas depto",
+        },
+        title=title,
+    )
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(margin={"r": 0, "t": 50, "l": 0, "b": 0})
+    return fig.to_dict()
+
+def with_geojson(fig_dict: dict, geojson: dict) -> go.Figure:
+    """Reconstruye el choropleth en caché y le asigna el geojson."""
+    fig = go.Figure(fig_dict)
+    fig.update_traces(geojson=geojson)
+    return fig
+
+def compute_spec_detail(df_spec: pd.DataFrame, label: str, categoria: str):
+    """
+    Parte de cálculo de una especificación, sin llamadas a st.* para poder
+    correrla en hilos: normaliza, resume por año, ordena y arma la figura.
+    Devuelve (df_spec, summary_spec, tabla_spec, order_resp_spec, fig_dict);
+    si no queda nada tras el filtro, summary_spec viene vacío y el resto en None.
+    """
+    # -------------------------------
+    # NORMALIZACIONES ESPECIALES
+    # -------------------------------
+    normalizar = normalizer_for_spec(label.lower(), categoria)
+    if normalizar is not None:
+        # assign: frame nuevo que comparte las demás columnas (sin copy() completo);
+        # como category: el groupby de summarize_by_year trabaja sobre códigos
+        df_spec = df_spec.assign(
+            **{COL_RESPUESTA: normalizar(df_spec[COL_RESPUESTA]).astype("category")}
+        )
+
+    summary_spec = summarize_by_year(df_spec, COL_RESPUESTA)
+
+    # filtro global para especificaciones
+    summary_spec = summary_spec[
+        ~((summary_spec[COL_YEAR] == 2025) & (summary_spec["pct"] < PCT_MIN_2025))
+    ]
+    if summary_spec.empty:
+        return df_spec, summary_spec, None, None, None
+
+    summary_spec["Año"] = summary_spec[COL_YEAR].astype(str)
+
+    tabla_spec, order_resp_spec = pivot_summary(summary_spec)
+
+    fig_dict = build_bar_fig(
+        summary_spec,
+        tuple(order_resp_spec),
+        f"{categoria} – comparación 2020 vs 2025 ({label})",
+        margin_t=60,
+        margin_b=100,
+    )
+    return df_spec, summary_spec, tabla_spec, order_resp_spec, fig_dict
+
 
 def render_categoria_dashboard(agrupacion: str, categoria: str):
     st.markdown(
@@ -898,14 +1776,14 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
         unsafe_allow_html=True
     )
 
-    df = load_data_for_categoria(agrupacion, categoria)
+    # Multiselect ya viene separado desde SQL; respuesta “bonita” con label_es
+    df = prepare_data_for_categoria(agrupacion, categoria)
     if df.empty:
         st.info("No hay datos para esta categoría.")
         return
 
-    # Explota multiselect y usa columna “bonita” para la respuesta
-    df = explode_multiselect(df, COL_RESPUESTA)
-    df = normalize_respuesta_using_label(df)
+    # geojson en caché de recurso: una sola lectura para ambos casos
+    guate_geo, _ = load_guate_geojson()
 
     total_resp = len(df)
     total_pers = df[COL_RESPONDENT].nunique() if COL_RESPONDENT in df.columns else None
@@ -920,28 +1798,20 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
     # Detectar si esta categoría tiene "especificaciones"
     # ---------------------------------------------------
 
-    def clean_spec(v):
-        if v is None:
-            return None
-        s = str(v).strip()
-        if s == "":
-            return None
-        low = s.lower()
-        if low in ("none", "nan", "sin especificacion", "sin especificación"):
-            return None
-        return s
-
     spec_col = None
 
     if COL_ESPECIF in df.columns:
-        df["spec_tmp"] = df[COL_ESPECIF].apply(clean_spec)
+        spec = df[COL_ESPECIF].astype("string").str.strip()
+        df["spec_tmp"] = spec.mask(
+            spec.eq("")
+            | spec.str.lower().isin(["none", "nan", "sin especificacion", "sin especificación"])
+        ).astype("category")
         if df["spec_tmp"].notna().any():
             spec_col = "spec_tmp"
 
     if spec_col is None and COL_LABEL_ES in df.columns:
-        df["spec_from_label"] = df[COL_LABEL_ES].apply(
-            lambda v: str(v).strip() if pd.notna(v) and str(v).strip() != "" else None
-        )
+        spec_label = df[COL_LABEL_ES].astype("string").str.strip()
+        df["spec_from_label"] = spec_label.mask(spec_label.eq("")).astype("category")
         if df["spec_from_label"].notna().any():
             spec_col = "spec_from_label"
 
@@ -953,7 +1823,7 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
     if not has_specs:
         st.markdown("### Distribución nacional 2020 vs 2025 (toda la categoría)")
 
-        summary = summarize_by_year(df, COL_RESPUESTA)
+        summary = load_summary_by_year(agrupacion, categoria)
 
         # filtro global: quitar categorías < PCT_MIN_2025 en 2025
         summary = summary[
@@ -966,52 +1836,32 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
 
         summary["Año"] = summary[COL_YEAR].astype(str)
 
-        order_resp = (
-            summary.groupby(COL_RESPUESTA)["pct"]
-            .mean()
-            .sort_values(ascending=False)
-            .index.tolist()
-        )
+        # un solo pivot (en caché) da el orden de las barras y la tabla de abajo
+        tabla, order_resp = pivot_summary(summary)
 
-        fig = px.bar(
+        fig = go.Figure(build_bar_fig(
             summary,
-            x=COL_RESPUESTA,
-            y="pct",
-            color="Año",
-            barmode="group",
-            category_orders={COL_RESPUESTA: order_resp},
-            labels={COL_RESPUESTA: "Respuesta", "pct": "% dentro del año"},
-            title=f"{categoria} – comparación 2020 vs 2025 (general)",
-        )
-        fig.update_traces(
-            hovertemplate="Respuesta=%{x}<br>% dentro del año=%{y:.2f}<extra></extra>"
-        )
-        fig.update_xaxes(type="category")
-        fig.update_layout(
-            yaxis=dict(tickformat=".2f"),
-            xaxis_tickangle=-30,
-            legend_title_text="Año",
-            margin=dict(t=70, b=120),
-        )
+            tuple(order_resp),
+            f"{categoria} – comparación 2020 vs 2025 (general)",
+        ))
         st.plotly_chart(fig, use_container_width=True)
 
-        st.dataframe(
-            summary
-            .pivot_table(index=COL_RESPUESTA, columns=COL_YEAR, values="pct", fill_value=0.0)
-            .reindex(order_resp)
-            .rename(columns={2020: "pct_2020", 2025: "pct_2025"})
-            .reset_index()
-        )
+        st.dataframe(tabla)
 
         # ----- mapa general -----
         st.markdown("---")
-        st.markdown("### Mapa por departamento (toda la categoría)")
+        # mismo patrón que los mapas por especificación: un expander igual
+        # ejecuta su contenido, así que el toggle deja el flag en session_state
+        # y load_depto_summary y el choropleth solo corren si se pide el mapa
+        open_key = safe_key(f"{categoria}_open_general")
+        st.toggle("Ver mapa por departamento (toda la categoría)", key=open_key)
+        if not st.session_state.get(open_key):
+            return
 
         if COL_DEPTO not in df.columns or df[COL_DEPTO].dropna().empty:
             st.info("No existe columna de departamento o no hay datos para esta categoría.")
             return
 
-        guate_geo = load_guate_geojson()
         if guate_geo is None:
             st.info("No se encontró el archivo 'mapita.geojson'.")
             return
@@ -1031,21 +1881,16 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
                 key=safe_key(f"{categoria}_year_general")
             )
         with col_sel2:
-            summary_all = summarize_by_year(df, COL_RESPUESTA)
-            summary_all = summary_all[
-                ~((summary_all[COL_YEAR] == 2025) & (summary_all["pct"] < PCT_MIN_2025))
-            ]
-            summary_year = summary_all[summary_all[COL_YEAR] == year_sel]
-
-            respuestas_disp = (
-                summary_year[COL_RESPUESTA]
-                .dropna()
-                .astype(str)
-                .str.strip()
-                .unique()
-                .tolist()
-            )
-            respuestas_disp = sorted(respuestas_disp)
+            # opciones de la misma relación que el mapa (la tabla, no la vista
+            # materializada): así no se ofrecen respuestas sin filas en el mapa
+            # si la vista quedó sin REFRESH. Mismo filtro de PCT_MIN_2025.
+            depto_summary = load_depto_summary(agrupacion, categoria)
+            df_year = depto_summary[depto_summary[COL_YEAR] == year_sel]
+            n_resp = df_year.groupby(df_year[COL_RESPUESTA].str.strip())["n"].sum()
+            if year_sel == 2025:
+                # redondeado como el pct de SQL, para coincidir con las barras
+                n_resp = n_resp[(n_resp * 100 / n_resp.sum()).round(2) >= PCT_MIN_2025]
+            respuestas_disp = n_resp.index.tolist()
 
             resp_sel = st.selectbox(
                 "Respuesta a mapear (% que eligió esta opción, general)",
@@ -1053,49 +1898,24 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
                 key=safe_key(f"{categoria}_resp_general")
             )
 
-        df_year = df[df[COL_YEAR] == year_sel].copy()
-        full_map = build_depto_map_df(df_year, COL_DEPTO, COL_RESPUESTA, resp_sel, guate_geo)
+        full_map = build_depto_map_cached(
+            (agrupacion, categoria, None, year_sel), depto_summary, resp_sel, col_n="n"
+        )
 
         if full_map.empty:
             st.info("No hay datos para dibujar el mapa general con esta combinación.")
             return
 
-        fig_dep = px.choropleth(
-            full_map,
-            geojson=guate_geo,
-            locations="depto_norm",
-            featureidkey="properties.NAME_STD",
-            color="pct",
-            color_continuous_scale="Blues",
-            hover_data={
-                "label_depto": True,
-                "n": True,
-                "total_dep": True,
-                "pct": ':.2f',
-            },
-            labels={
-                "pct": "% que eligió la respuesta",
-                "label_depto": "Departamento",
-                "n": "N respuestas",
-                "total_dep": "Total respuestas depto",
-            },
-            title=f"{year_sel} – '{resp_sel}' (general)",
+        fig_dep = with_geojson(
+            build_choropleth_fig(
+                full_map, f"{year_sel} – '{resp_sel}' (general)", "N respuestas"
+            ),
+            guate_geo,
         )
-        fig_dep.update_geos(fitbounds="locations", visible=False)
-        fig_dep.update_layout(margin={"r": 0, "t": 50, "l": 0, "b": 0})
         st.plotly_chart(fig_dep, use_container_width=True)
 
         st.markdown("#### Tabla por departamento (general)")
-        st.dataframe(
-            full_map[["label_depto", "n", "total_dep", "pct"]]
-            .sort_values("pct", ascending=False)
-            .rename(columns={
-                "label_depto": "Departamento",
-                "n": "N respuesta",
-                "total_dep": "Total depto",
-                "pct": "% respuesta",
-            })
-        )
+        st.dataframe(build_depto_table(full_map))
         return  # fin caso sin especificaciones
 
     # ==========================================
@@ -1104,507 +1924,35 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
 
     st.markdown("### Detalle por especificación")
 
-    spec_values = sorted(df[spec_col].dropna().unique().tolist())
+    # spec_col es category: sus categorías ya son los valores únicos ordenados
+    spec_values = df[spec_col].cat.categories.tolist()
     if not spec_values:
         st.info("No se encontraron valores de especificación válidos.")
         return
 
-    guate_geo = load_guate_geojson()
-
-    import re  # lo usamos en varias normalizaciones
+    # una sola pasada para partir el frame por especificación
+    df_by_spec = dict(iter(df.groupby(spec_col, sort=False, observed=True)))
+    specs = [
+        (idx_spec, str(spec), df_by_spec[spec])
+        for idx_spec, spec in enumerate(spec_values)
+        if spec in df_by_spec and not df_by_spec[spec].empty
+    ]
 
-    for idx_spec, spec in enumerate(spec_values):
-        label = str(spec)
+    # 1) cálculo en paralelo (cada especificación es independiente);
+    #    map conserva el orden, así el dibujo de abajo sale igual que antes
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=4,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    ) as executor:
+        detalles = list(executor.map(
+            lambda item: compute_spec_detail(item[2], item[1], categoria), specs
+        ))
+
+    # 2) dibujo en serie, en el orden de spec_values
+    for (idx_spec, label, _), detalle in zip(specs, detalles):
         key_suffix = safe_key(f"{idx_spec}_{label}")
-
-        df_spec = df[df[spec_col] == spec]
-        if df_spec.empty:
-            continue
-
-        # -------------------------------
-        # NORMALIZACIONES ESPECIALES
-        # -------------------------------
-        label_lower = label.lower()
-
-        # 0) CÓDIGO del país: Entrevistado, Madre, Padre → Guatemala / Otras
-        if ("código del país" in label_lower) and ("entrevistado, madre, padre" in label_lower):
-            def normalize_codigo_pais(v: str) -> str:
-                s = str(v).strip().lower()
-                if any(x in s for x in ["502", "guatemala", "gtm"]):
-                    return "Guatemala"
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_codigo_pais)
-
-        # 1) Situación actual si eres mujer
-        elif "situación actual si eres mujer" in label_lower:
-            def normalize_situacion_mujer(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if "mujer gestante" in s:
-                    return "Mujer gestante"
-
-                if "madre lactante" in s:
-                    return "Madre lactante"
-
-                if "mujer no gestante" in s:
-                    return "Mujer no gestante"
-
-                if ("niñ" in s) or ("hijo" in s) or ("hija" in s):
-                    return "Tiene niño/a"
-
-                if any(x in s for x in ["hombre", "soy hombre", "masculino"]):
-                    return "Hombre"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_situacion_mujer)
-
-        # 2) ¿Cuántos hijos cree usted que debieran tener los hogares…?
-        elif "cuántos hijos cree usted" in label_lower:
-            def normalize_hijos_value(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if "2 o 3" in s:
-                    return "3"
-
-                nums = re.findall(r"\d+", s)
-                if not nums:
-                    return "Otras respuestas"
-
-                n = int(nums[0])
-                if n > 10:
-                    return "Otras respuestas"
-
-                return str(n)
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_hijos_value)
-
-        # 3) ¿A qué edad completó (o completará) su educación a tiempo completo…?
-        elif "a qué edad completó (o completará) su educación a tiempo completo" in label_lower:
-            def normalize_edad_educ(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if "no estudia" in s or "ya no estudia" in s:
-                    return "No estudia / no completará"
-
-                if "no indica" in s or "no responde" in s:
-                    return "No indica"
-
-                if "no recuerda" in s or "no se" in s or "no sé" in s:
-                    return "No sabe / no recuerda"
-
-                if "no aplica" in s:
-                    return "No aplica"
-
-                nums = re.findall(r"\d+", s)
-                if not nums:
-                    return "Otras respuestas"
-
-                edad = int(nums[0])
-                if edad < 5 or edad > 80:
-                    return "Otras respuestas"
-
-                return str(edad)
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_edad_educ)
-
-        # 4) ¿Cuál es el nivel educativo más alto que usted, su cónyuge, su madre y su padre han alcanzado?
-        elif "nivel educativo más alto que usted, su cónyuge, su madre y su padre han alcanzado" in label_lower:
-            def normalize_nivel_educ(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if s.startswith("0"):
-                    return "0 Sin educación / preescolar"
-                if s.startswith("1"):
-                    return "1 Primaria"
-                if s.startswith("2"):
-                    return "2 Básica / primer ciclo"
-                if s.startswith("3"):
-                    return "3 Secundaria / diversificado"
-
-                if any(x in s for x in [
-                    "cirug", "ingenier", "medicin", "odontolog", "título de licenciatura",
-                    "titulo de licenciatura", "licenciatura", "etc."
-                ]):
-                    if s.startswith("5"):
-                        return "5 Postgrado"
-                    return "4 Licenciatura / universitario"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_nivel_educ)
-
-        # 5) ¿Cuánto le toma llegar al centro de salud más cercano?
-        elif "cuánto le toma llegar al centro de salud más cercano" in label_lower:
-            def normalize_tiempo_salud(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if "5 min" in s or "5 minutos" in s:
-                    return "5 minutos"
-                if "10 min" in s or "10 minutos" in s:
-                    return "10 minutos"
-                if "15 minutos" in s:
-                    return "15 minutos"
-                if "20 minutos" in s:
-                    return "20 minutos"
-                if ("30 minutos" in s) or ("30 min" in s) or ("media hora" in s):
-                    return "30 minutos"
-
-                if "1hr" in s or "1 hr" in s or "1 hora" in s:
-                    return "1 hora"
-                if "2 horas" in s or "dos horas" in s:
-                    return "2 horas"
-                if "4 horas" in s:
-                    return "4 horas"
-                if "más de 6 horas" in s or "mas de 6 horas" in s:
-                    return "Más de 6 horas"
-
-                if "menos de 1 hora" in s or "minutos" in s or s == "menos":
-                    return "Menos de 1 hora"
-
-                if "no indica" in s or "no se" in s or "no sé" in s:
-                    return "No indica / no sabe"
-
-                m = re.search(r"(\d+)\s*min", s)
-                if m:
-                    mins = int(m.group(1))
-                    return f"{mins} minutos"
-
-                m = re.search(r"(\d+)\s*hora", s)
-                if m:
-                    horas = int(m.group(1))
-                    if horas == 1:
-                        return "1 hora"
-                    return f"{horas} horas"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_tiempo_salud)
-
-        # 6) De todo lo que hemos platicado, ¿qué esperaría de un centro de Salud nutricional…?
-        elif "centro de salud nutricional para sus hijos" in label_lower:
-            def normalize_expectativas_centro(v: str) -> str:
-                s = str(v).strip().lower()
-
-                if any(x in s for x in ["ayuda", "apoyo", "apoyar"]):
-                    return "Ayuda / apoyo"
-
-                if "atenci" in s or "servicio" in s:
-                    return "Buena atención / servicio"
-
-                if "medic" in s:
-                    return "Medicamentos"
-
-                if "aliment" in s:
-                    return "Plan de alimentación"
-
-                if "médica" in s or "medica" in s or "doctor" in s:
-                    return "Atención médica"
-
-                if s in ("si", "sí", "s", ".", ""):
-                    return "No especifica / sí"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_expectativas_centro)
-
-        # 7) Si mañana hubiera elecciones, ¿por cuál partido votaría usted…?
-        elif "si mañana hubiera elecciones" in label_lower and "por cuál partido votaría" in label_lower:
-            def normalize_intencion_voto(v: str) -> str:
-                s = str(v).strip().lower()
-
-                # Partidos específicos
-                if "semilla" in s:
-                    return "Movimiento Semilla"
-                if "unidad nacional de la esperanza" in s or " une" in s or s == "une":
-                    return "UNE"
-                if "valor" in s:
-                    return "Valor"
-                if "avanzada nacional" in s or " pan" in s or s == "pan":
-                    return "PAN"
-                if "winaq" in s:
-                    return "Winaq"
-
-                # No sabe / ninguno / confidencial
-                if "no sabe" in s or "no se" in s or "no sé" in s:
-                    return "No sabe"
-                if "ninguno" in s or "nadie" in s:
-                    return "Ninguno / nadie"
-                if "confidencial" in s:
-                    return "Confidencial"
-
-                # Todo lo demás
-                return "Otros partidos"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_intencion_voto)
-
-        # 8) Si una mujer gana más que su marido es casi seguro que creará problemas
-        elif "si una mujer gana más que su marido es casi seguro que creará problemas" in label_lower:
-            def normalize_problema_ingreso_mujer(v: str) -> str:
-                s = str(v).strip().lower()
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Neutro
-                if "ni de acuerdo ni en desacuerdo" in s or "ni acuerdo ni desacuerdo" in s:
-                    return "Ni de acuerdo ni en desacuerdo"
-
-                # DESACUERDO 
-                if ("totalmente" in s and "desacuerdo" in s) or ("muy" in s and "desacuerdo" in s):
-                    return "Totalmente en desacuerdo"
-                
-                if "desacuerdo" in s:
-                    return "En desacuerdo"
-
-                # -----------------------------
-                # ACUERDO (UNIFICAR SOLO MUY + TOTALMENTE)
-                # -----------------------------
-                if ("totalmente" in s and "acuerdo" in s) or ("muy" in s and "acuerdo" in s):
-                    return "Totalmente de acuerdo"
-
-                if s == "de acuerdo" or "de acuerdo" in s:
-                    return "De acuerdo"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_problema_ingreso_mujer)
-
-        # Jobs scarce – Employers should give priority to (nation) people than immigrants
-        elif (
-            "employers should give priority" in label_lower
-            or "jobs scarce" in label_lower
-        ):
-            def normalize_jobs_scarce(v: str) -> str:
-                s = str(v).strip().lower()
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Neutro
-                if "ni de acuerdo ni en desacuerdo" in s or "ni acuerdo ni desacuerdo" in s:
-                    return "Ni de acuerdo ni en desacuerdo"
-
-                # DESACUERDO 
-                if ("totalmente" in s and "desacuerdo" in s) or ("muy" in s and "desacuerdo" in s):
-                    return "Totalmente en desacuerdo"
-                
-                if "desacuerdo" in s:
-                    return "En desacuerdo"
-
-                # -----------------------------
-                # ACUERDO (UNIFICAR SOLO MUY + TOTALMENTE)
-                # -----------------------------
-                if ("totalmente" in s and "acuerdo" in s) or ("muy" in s and "acuerdo" in s):
-                    return "Totalmente de acuerdo"
-
-                if s == "de acuerdo" or "de acuerdo" in s:
-                    return "De acuerdo"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_jobs_scarce)
-
-        # Men should have more right to a job than women
-        elif (
-            "men should have more right to a job than women" in label_lower
-            or "men should have more right" in label_lower
-        ):
-            def normalize_men_more_right_job(v: str) -> str:
-                s = str(v).strip().lower()
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Neutro
-                if "ni de acuerdo ni en desacuerdo" in s or "ni acuerdo ni desacuerdo" in s:
-                    return "Ni de acuerdo ni en desacuerdo"
-
-                # -----------------------------
-                # DESACUERDO
-                # -----------------------------
-                # Muy + Totalmente → Totalmente
-                if ("totalmente" in s and "desacuerdo" in s) or ("muy" in s and "desacuerdo" in s):
-                    return "Totalmente en desacuerdo"
-
-                if "desacuerdo" in s:
-                    return "En desacuerdo"
-
-                # -----------------------------
-                # ACUERDO (UNIFICAR SOLO MUY + TOTALMENTE)
-                # -----------------------------
-                if ("totalmente" in s and "acuerdo" in s) or ("muy" in s and "acuerdo" in s):
-                    return "Totalmente de acuerdo"
-
-                if s == "de acuerdo" or "de acuerdo" in s:
-                    return "De acuerdo"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_men_more_right_job)
-
-        # It is children duty to take care of ill parent
-        elif (
-            "it is children duty to take care of ill parent" in label_lower
-            or "children duty to take care" in label_lower
-            or "take care of ill parent" in label_lower
-            or "cuidado continuo a sus padres" in label_lower
-            or "cuidado continuo" in label_lower
-        ):
-            def normalize_children_duty_care_parent(v: str) -> str:
-                s = str(v).strip().lower()
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Neutro
-                if "ni de acuerdo ni en desacuerdo" in s or "ni acuerdo ni desacuerdo" in s:
-                    return "Ni de acuerdo ni en desacuerdo"
-
-                # DESACUERDO (unificar muy + totalmente)
-                if ("totalmente" in s and "desacuerdo" in s) or ("muy" in s and "desacuerdo" in s):
-                    return "Totalmente en desacuerdo"
-
-                if "desacuerdo" in s:
-                    return "En desacuerdo"
-
-                # ACUERDO (unificar muy + totalmente)
-                if ("totalmente" in s and "acuerdo" in s) or ("muy" in s and "acuerdo" in s):
-                    return "Totalmente de acuerdo"
-
-                if s == "de acuerdo" or "de acuerdo" in s:
-                    return "De acuerdo"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_children_duty_care_parent)
-
-        elif categoria.strip().lower() == "important in life":
-            def normalize_important_in_life(v: str) -> str:
-                s = "" if v is None else str(v).strip().lower()
-                s = " ".join(s.split())
-
-                # OJO: "no muy importante" debe ir antes que "muy importante"
-                if "no muy importante" in s:
-                    return "No muy importante"
-                if "muy importante" in s:
-                    return "Muy importante"
-                if "bastante importante" in s:
-                    return "Bastante importante"
-                if "nada importante" in s:
-                    return "Nada importante"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_important_in_life)
-
-         # Important child qualities (multi-select: hasta cinco)
-        elif (
-            "important child qualities" in label_lower
-            or "cualidades que pueden fomentarse en el hogar" in label_lower
-            or "cualidades" in label_lower and "hasta cinco" in label_lower
-        ):
-            def normalize_child_qualities(v: str) -> str:
-                s = "" if v is None else str(v).strip().lower()
-                s = " ".join(s.split())
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Normalizaciones generales (tildes/variantes típicas)
-                s = s.replace("ó", "o").replace("á", "a").replace("é", "e").replace("í", "i").replace("ú", "u")
-                s = s.replace(" / ", "/").replace(" /", "/").replace("/ ", "/")
-                s = s.replace(" y ", " ").replace("&", " ")
-                s = " ".join(s.split())
-
-                # Mapeo a etiqueta estándar (lo que tú quieres ver en gráfica)
-                MAP = {
-                    "buenos modales": "Buenos modales",
-                    "sentido de responsabilidad": "Sentido de responsabilidad",
-                    "tolerancia y respeto hacia otros": "Tolerancia y respeto hacia otros",
-                    "tolerancia respeto hacia otros": "Tolerancia y respeto hacia otros",
-                    "obediencia": "Obediencia",
-                    "fe religiosa": "Fe religiosa",
-                    "fe religosa": "Fe religiosa",
-                    "independencia": "Independencia",
-                    "trabajo duro/dedicacion al trabajo": "Trabajo duro / dedicación al trabajo",
-                    "trabajo duro dedicacion al trabajo": "Trabajo duro / dedicación al trabajo",
-                    "determinacion/perseverancia": "Determinación / perseverancia",
-                    "determinacion perseverancia": "Determinación / perseverancia",
-                    "generosidad": "Generosidad",
-                    "altruismo": "Altruismo",
-                    "imaginacion": "Imaginación",
-                    "sentido de la economia y espiritu de ahorro": "Sentido de la economía y espíritu de ahorro",
-                    "sentido de la economia espiritu de ahorro": "Sentido de la economía y espíritu de ahorro",
-                }
-
-                if s in MAP:
-                    return MAP[s]
-
-                # fallback: capitaliza “bonito” si no estaba en el mapa
-                return str(v).strip()
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_child_qualities)
-
-        # Future changes – Greater respect for authority
-        elif (
-            "greater respect for authority" in label_lower
-            or ("future changes" in label_lower and "respect for authority" in label_lower)
-        ):
-            def normalize_future_respect_authority(v: str) -> str:
-                s = "" if v is None else str(v).strip().lower()
-                s = " ".join(s.split())
-
-                # No sabe / no responde
-                if any(x in s for x in ["no sabe", "no se", "no responde", "ns/nr", "nsnr"]):
-                    return "No sabe / No responde"
-
-                # Normalizar tildes mínimas (por si viene "importaría")
-                s = (
-                    s.replace("á", "a").replace("é", "e").replace("í", "i")
-                     .replace("ó", "o").replace("ú", "u")
-                )
-
-                # Categorías
-                if s in ("bueno", "bien", "good"):
-                    return "Bueno"
-
-                if s in ("malo", "mal", "bad"):
-                    return "Malo"
-
-                # "No me importa"
-                if ("no me importa" in s) or (s == "no importa") or ("doesnt matter" in s) or ("doesn't matter" in s):
-                    return "No me importa"
-
-                # "No le importaría"
-                if ("no le importaria" in s) or ("no le importaria" in s) or ("wouldnt mind" in s) or ("wouldn't mind" in s):
-                    return "No me importa"
-
-                return "Otras respuestas"
-
-            df_spec = df_spec.copy()
-            df_spec[COL_RESPUESTA] = df_spec[COL_RESPUESTA].apply(normalize_future_respect_authority)
-
+        df_spec, summary_spec, tabla_spec, order_resp_spec, fig_dict = detalle
 
         # -------------------------------
         # RESUMEN Y GRÁFICA
@@ -1612,57 +1960,23 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
 
         st.markdown(f"#### Especificación: {label}")
 
-        summary_spec = summarize_by_year(df_spec, COL_RESPUESTA)
-
-        # filtro global para especificaciones
-        summary_spec = summary_spec[
-            ~((summary_spec[COL_YEAR] == 2025) & (summary_spec["pct"] < PCT_MIN_2025))
-        ]
-
         if summary_spec.empty:
             st.info("No hay datos suficientes para esta especificación después del filtro.")
             continue
 
-        summary_spec["Año"] = summary_spec[COL_YEAR].astype(str)
+        st.plotly_chart(go.Figure(fig_dict), use_container_width=True)
 
-        order_resp_spec = (
-            summary_spec.groupby(COL_RESPUESTA)["pct"]
-            .mean()
-            .sort_values(ascending=False)
-            .index.tolist()
-        )
-
-        fig_spec = px.bar(
-            summary_spec,
-            x=COL_RESPUESTA,
-            y="pct",
-            color="Año",
-            barmode="group",
-            category_orders={COL_RESPUESTA: order_resp_spec},
-            labels={COL_RESPUESTA: "Respuesta", "pct": "% dentro del año"},
-            title=f"{categoria} – comparación 2020 vs 2025 ({label})",
-        )
-        fig_spec.update_traces(
-            hovertemplate="Respuesta=%{x}<br>% dentro del año=%{y:.2f}<extra></extra>"
-        )
-        fig_spec.update_xaxes(type="category")
-        fig_spec.update_layout(
-            yaxis=dict(tickformat=".2f"),
-            xaxis_tickangle=-30,
-            legend_title_text="Año",
-            margin=dict(t=60, b=100),
-        )
-        st.plotly_chart(fig_spec, use_container_width=True)
-
-        st.dataframe(
-            summary_spec
-            .pivot_table(index=COL_RESPUESTA, columns=COL_YEAR, values="pct", fill_value=0.0)
-            .reindex(order_resp_spec)
-            .rename(columns={2020: "pct_2020", 2025: "pct_2025"})
-            .reset_index()
-        )
+        st.dataframe(tabla_spec)
 
         # ----- mapa por especificación -----
+        # un expander no evita que su contenido se ejecute; el toggle deja el
+        # flag en session_state y el mapa solo se arma si el usuario lo pide
+        open_key = safe_key(f"{categoria}_open_{key_suffix}")
+        st.toggle(f"Ver mapa por departamento ({label})", key=open_key)
+        if not st.session_state.get(open_key):
+            st.markdown("---")
+            continue
+
         if COL_DEPTO not in df_spec.columns or df_spec[COL_DEPTO].dropna().empty:
             st.info("No hay datos de departamento para esta especificación.")
             st.markdown("---")
@@ -1673,46 +1987,48 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
             st.markdown("---")
             continue
 
-        años_disp_spec = sorted(df_spec[COL_YEAR].dropna().unique().tolist())
-        años_disp_spec = [a for a in años_disp_spec if a in (2020, 2025)]
+        # años del resumen (pocas filas); df_spec se recorta por año solo
+        # dentro de build_depto_map_cached, cuando no hay caché
+        años_resumen = set(summary_spec[COL_YEAR].unique())
+        años_disp_spec = [y for y in (2020, 2025) if y in años_resumen]
         if not años_disp_spec:
             st.info("No hay datos 2020/2025 para esta especificación.")
             st.markdown("---")
             continue
 
-        col_sel1, col_sel2 = st.columns(2)
-        with col_sel1:
-            year_sel_spec = st.selectbox(
-                f"Año para el mapa ({label})",
-                años_disp_spec,
-                index=0,
-                key=safe_key(f"{categoria}_year_{key_suffix}")
-            )
-        with col_sel2:
-            respuestas_disp_spec = (
-                summary_spec[summary_spec[COL_YEAR] == year_sel_spec][COL_RESPUESTA]
-                .dropna()
-                .astype(str)
-                .str.strip()
-                .unique()
-                .tolist()
-            )
-            respuestas_disp_spec = sorted(respuestas_disp_spec)
-
-            if not respuestas_disp_spec:
-                st.info("No hay respuestas para mapear en esta especificación.")
-                st.markdown("---")
-                continue
+        # un solo form: cambiar año y respuesta provoca un único rerun al enviar.
+        # Las opciones no pueden depender del año aún sin enviar, así que se
+        # ofrecen las respuestas de ambos años (el mapa muestra 0% si faltan).
+        respuestas_disp_spec = (
+            summary_spec[COL_RESPUESTA]
+            .cat.remove_unused_categories()
+            .cat.categories
+            .tolist()
+        )
+        if not respuestas_disp_spec:
+            st.info("No hay respuestas para mapear en esta especificación.")
+            st.markdown("---")
+            continue
 
-            resp_sel_spec = st.selectbox(
-                f"Respuesta a mapear ({label})",
-                respuestas_disp_spec,
-                key=safe_key(f"{categoria}_resp_{key_suffix}")
-            )
+        with st.form(key=safe_key(f"{categoria}_form_{key_suffix}")):
+            col_sel1, col_sel2 = st.columns(2)
+            with col_sel1:
+                year_sel_spec = st.selectbox(
+                    f"Año para el mapa ({label})",
+                    años_disp_spec,
+                    index=0,
+                    key=safe_key(f"{categoria}_year_{key_suffix}")
+                )
+            with col_sel2:
+                resp_sel_spec = st.selectbox(
+                    f"Respuesta a mapear ({label})",
+                    respuestas_disp_spec,
+                    key=safe_key(f"{categoria}_resp_{key_suffix}")
+                )
+            st.form_submit_button("Actualizar mapa")
 
-        df_year_spec = df_spec[df_spec[COL_YEAR] == year_sel_spec].copy()
-        full_map_spec = build_depto_map_df(
-            df_year_spec, COL_DEPTO, COL_RESPUESTA, resp_sel_spec, guate_geo
+        full_map_spec = build_depto_map_cached(
+            (agrupacion, categoria, label, year_sel_spec), df_spec, resp_sel_spec
         )
 
         if full_map_spec.empty:
@@ -1720,42 +2036,18 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
             st.markdown("---")
             continue
 
-        fig_dep_spec = px.choropleth(
-            full_map_spec,
-            geojson=guate_geo,
-            locations="depto_norm",
-            featureidkey="properties.NAME_STD",
-            color="pct",
-            color_continuous_scale="Blues",
-            hover_data={
-                "label_depto": True,
-                "n": True,
-                "total_dep": True,
-                "pct": ':.2f',
-            },
-            labels={
-                "pct": "% que eligió la respuesta",
-                "label_depto": "Departamento",
-                "n": "N respuesta",
-                "total_dep": "Total respuestas depto",
-            },
-            title=f"{year_sel_spec} – '{resp_sel_spec}' ({label})",
+        fig_dep_spec = with_geojson(
+            build_choropleth_fig(
+                full_map_spec,
+                f"{year_sel_spec} – '{resp_sel_spec}' ({label})",
+                "N respuesta",
+            ),
+            guate_geo,
         )
-        fig_dep_spec.update_geos(fitbounds="locations", visible=False)
-        fig_dep_spec.update_layout(margin={"r": 0, "t": 50, "l": 0, "b": 0})
         st.plotly_chart(fig_dep_spec, use_container_width=True)
 
         st.markdown(f"##### Tabla por departamento ({label})")
-        st.dataframe(
-            full_map_spec[["label_depto", "n", "total_dep", "pct"]]
-            .sort_values("pct", ascending=False)
-            .rename(columns={
-                "label_depto": "Departamento",
-                "n": "N respuesta",
-                "total_dep": "Total depto",
-                "pct": "% respuesta",
-            })
-        )
+        st.dataframe(build_depto_table(full_map_spec))
 
         st.markdown("---")
 
@@ -1766,31 +2058,30 @@ def render_categoria_dashboard(agrupacion: str, categoria: str):
 
 def render_categoria_cards(agrupacion: str, categorias: List[str]):
     st.markdown(f"### Categorías dentro de {agrupacion}")
-    cols = st.columns(3)
+    url_agr = quote_plus(agrupacion)  # igual para todas las tarjetas
 
-    for idx, cat in enumerate(categorias):
-        if not str(cat).strip():
-            continue
-
-        col = cols[idx % 3]
-
-        url_agr = quote_plus(agrupacion)
+    # todas las tarjetas en un solo st.markdown (rejilla CSS .wvs-cat-grid)
+    # en vez de un elemento de Streamlit por tarjeta
+    cards = []
+    # load_categorias ya descarta vacías / 'none' / 'nan'
+    for cat in categorias:
         url_cat = quote_plus(cat)
         href = f"?agr={url_agr}&cat={url_cat}"
 
         icon_class = category_icon_for(agrupacion, cat)
 
-        card_html = f"""
-        <a href="{href}" target="_self" class="wvs-card-cat">
-            <div class="wvs-card-cat-icon">
-                <i class="{icon_class}"></i>
-            </div>
-            <div class="wvs-card-cat-text">{cat}</div>
-        </a>
-        """
+        # sin sangría: en markdown una línea con 4+ espacios sería código
+        cards.append(
+            f'<a href="{href}" target="_self" class="wvs-card-cat">'
+            f'<div class="wvs-card-cat-icon"><i class="{icon_class}"></i></div>'
+            f'<div class="wvs-card-cat-text">{cat}</div>'
+            f'</a>'
+        )
 
-        with col:
-            st.markdown(card_html, unsafe_allow_html=True)
+    st.markdown(
+        f'<div class="wvs-cat-grid">{"".join(cards)}</div>',
+        unsafe_allow_html=True,
+    )
 
 # ==========================================
 # MAIN
@@ -1803,18 +2094,9 @@ def main():
         unsafe_allow_html=True
     )
 
-    params = st.query_params
-
-    raw_agr = params.get("agr", None)
-    if isinstance(raw_agr, list):
-        raw_agr = raw_agr[0]
-
-    raw_cat = params.get("cat", None)
-    if isinstance(raw_cat, list):
-        raw_cat = raw_cat[0]
-
-    selected_agr = unquote_plus(raw_agr) if raw_agr else None
-    selected_cat = unquote_plus(raw_cat) if raw_cat else None
+    # st.query_params devuelve el último valor de cada clave como str
+    selected_agr = unquote_plus(st.query_params.get("agr", "")) or None
+    selected_cat = unquote_plus(st.query_params.get("cat", "")) or None
 
     # Vista categoría
     if selected_agr and selected_cat:
@@ -1833,6 +2115,14 @@ def main():
             st.query_params.clear()
             st.rerun()
 
+        categorias = load_categorias(selected_agr)
+
+        if selected_agr == "Demographic and Socioeconomic":
+            categorias = [c for c in categorias if c not in _DEMOG_EXCLUDED]
+
+        # mientras se dibuja esta vista, se adelantan las consultas de cada categoría
+        prefetch_categorias(selected_agr, categorias)
+
         st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
         st.markdown(f"## {selected_agr}")
 
@@ -1893,21 +2183,6 @@ def main():
 
         st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
-        categorias = load_categorias(selected_agr)
-
-        if selected_agr == "Demographic and Socioeconomic":
-            categorias = [
-                c for c in categorias
-                if c not in [
-                    "Age",
-                    "Country of birth",
-                    "Ethnic group",
-                    "Marital status",
-                    "Sex",
-                    "Year of birth",
-                ]
-            ]
-
         if categorias:
             render_categoria_cards(selected_agr, categorias)
         else:
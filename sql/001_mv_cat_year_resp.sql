@@ -0,0 +1,32 @@
+-- Conteos precalculados por agrupación × categoría × año × respuesta.
+-- El dashboard lee de aquí en vez de recorrer toda la tabla de encuestas.
+-- label_es y las columnas respuesta_grafica / respuesta_normalizada se
+-- conservan porque las consultas las usan para normalizar la respuesta.
+--
+-- Aplicar una vez sobre la base (la app no corre migraciones):
+--     psql "$DATABASE_URL" -f sql/001_mv_cat_year_resp.sql
+-- Mientras no exista, app.py (conteos_relation) agrega sobre la tabla.
+--
+-- Después de cada carga (ETL) a "WVS".encuestas_2020_2025:
+--     REFRESH MATERIALIZED VIEW "WVS".mv_cat_year_resp;
+-- Sin el REFRESH las barras (vista) y el mapa (tabla) pueden no coincidir.
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS "WVS".mv_cat_year_resp AS
+SELECT
+    agrupacion,
+    categoria,
+    year,
+    respuesta,
+    label_es,
+    respuesta_grafica,
+    respuesta_normalizada,
+    COUNT(*) AS n
+FROM "WVS".encuestas_2020_2025
+WHERE respuesta IS NOT NULL
+  AND year IN (2020, 2025)
+GROUP BY 1, 2, 3, 4, 5, 6, 7;
+
+CREATE INDEX IF NOT EXISTS idx_mv_cat_year_resp_agr_cat
+    ON "WVS".mv_cat_year_resp (agrupacion, categoria);
+
+ANALYZE "WVS".mv_cat_year_resp;
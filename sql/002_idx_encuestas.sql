@@ -0,0 +1,18 @@
+-- Índices alineados con los WHERE del dashboard sobre la tabla de encuestas.
+-- Los parciales (respuesta no nula) cubren la lectura de filas por
+-- agrupación (load_all_for_agrupacion) y el mapa por departamento
+-- (load_depto_summary). El listado de categorías (load_categorias) tiene
+-- que ver también las filas con respuesta nula, así que usa uno completo.
+
+CREATE INDEX IF NOT EXISTS idx_enc_agr_cat_year
+    ON "WVS".encuestas_2020_2025 (agrupacion, categoria, year)
+    WHERE respuesta IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_enc_agr_cat_depto
+    ON "WVS".encuestas_2020_2025 (agrupacion, categoria, departamento)
+    WHERE respuesta IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_enc_agr_cat
+    ON "WVS".encuestas_2020_2025 (agrupacion, categoria);
+
+ANALYZE "WVS".encuestas_2020_2025;